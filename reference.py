@@ -1,13 +1,21 @@
-import json
 import os
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError as RedisConnectionError
+import orjson
 from crawl4ai import *
 from openai import AsyncOpenAI
-from urllib.parse import urlparse
+from scraper_core import (
+    CACHE_EXPIRATION,
+    MAX_BATCH_URLS,
+    SUMMARY_SYSTEM_PROMPT,
+    check_cache_and_scrape_many,
+    compress_cache_value,
+    compress_markdown,
+    decompress_cache_value,
+)
 
 # FastAPI app initialization
 app = FastAPI(swagger_ui_parameters={"defaultModelsExpandDepth": -1})
@@ -35,10 +43,18 @@ client = AsyncOpenAI(
 
 # Redis setup (optional)
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379")
-redis_client = redis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
+redis_client = redis.from_url(REDIS_URL, decode_responses=False) if REDIS_URL else None
+
+# Shared crawler (one browser for the app's lifetime instead of one per request)
+crawler = AsyncWebCrawler()
+
+@app.on_event("startup")
+async def _startup() -> None:
+    await crawler.start()
 
 @app.on_event("shutdown")
 async def _shutdown() -> None:
+    await crawler.close()
     if redis_client:
         await redis_client.aclose()
 
@@ -46,38 +62,33 @@ async def _shutdown() -> None:
 class UrlRequest(BaseModel):
     url: str
 
-# Cache expiration time (24 hours)
-CACHE_EXPIRATION = 24 * 60 * 60  # 24 hours in seconds
+class UrlsRequest(BaseModel):
+    urls: list[str] = Field(..., max_length=MAX_BATCH_URLS)
 
 # Normalize URL function to avoid issues with slashes and query parameters
+# (plain string slicing; urlparse is needless work on this hot cache-key path)
 def normalize_url(url: str) -> str:
-    parsed_url = urlparse(url)
-    return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+    end = len(url)
+    for sep in ("?", "#"):
+        i = url.find(sep, 0, end)
+        if i != -1:
+            end = i
+    return url[:end].rstrip("/")
+
+def cache_key_for(url: str) -> str:
+    return f"scraped:{normalize_url(url)}"
 
 # Function to scrape and summarize the URL
 async def main(your_url: str):
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=your_url)
+    result = await crawler.arun(url=your_url)
 
     response = await client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
-            {
-                "role": "system",
-                "content": f"""
-                You are an assistant specialized in summarizing news. Your tasks are:
-                -Summarize the latest news based on the provided context: {result.markdown}.
-                -Use web search to find the most recent and relevant updates related to the context.
-                -Suggest additional ideas or angles based on the latest news.
-                -Attach a referral link (source link) to each piece of summarized news.
-                -Format your response in JSON format, including the following fields:
-                    - title: The title of the news article.
-                    - summary: A brief summary of the news article.
-                    - readMore: The referral link to the news article.
-                - Provide a list of all referral URLs at the end of your response.
-                - Ensure that the JSON is well-structured and easy to read.
-                """
-            },
+            # Fixed instructions in the system message; the page content
+            # goes in its own user message instead of inside the prompt.
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": compress_markdown(str(result.markdown or ""))},
         ],
         response_format={"type": "json_object"}
     )
@@ -86,8 +97,7 @@ async def main(your_url: str):
 
 # Function to check Redis cache and scrape if necessary
 async def check_cache_and_scrape(url: str):
-    normalized_url = normalize_url(url)
-    cache_key = f"scraped:{normalized_url}"
+    cache_key = cache_key_for(url)
 
     if not redis_client:
         return await main(url)
@@ -100,12 +110,12 @@ async def check_cache_and_scrape(url: str):
 
     if cached_data:
         print(f"Cache hit for URL: {url}")
-        return cached_data
+        return decompress_cache_value(cached_data)
 
     print(f"Cache miss for URL: {url}, scraping...")
     try:
         result = await main(url)
-        await redis_client.setex(cache_key, CACHE_EXPIRATION, result)
+        await redis_client.setex(cache_key, CACHE_EXPIRATION, compress_cache_value(result))
         print(f"Cache set for URL {url}: {result}")
         return result
     except (RedisConnectionError, OSError) as e:
@@ -130,4 +140,30 @@ async def APIHandle(body: UrlRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-    return {"Status": "Success", "Data": json.loads(result)}
+    return {"Status": "Success", "Data": orjson.loads(result)}
+
+# Endpoint for scraping several URLs in one request; URLs that fail are
+# reported in "Errors" (their "Data" entry is null) instead of failing the batch
+@app.post("/scraping/batch")
+async def APIHandleBatch(body: UrlsRequest):
+    print(f"Received {len(body.urls)} URLs")
+
+    try:
+        results = await check_cache_and_scrape_many(
+            body.urls, redis_client=redis_client, scrape=main, cache_key=cache_key_for
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    data = []
+    errors = {}
+    for url, result in zip(body.urls, results):
+        if isinstance(result, BaseException):
+            print(f"Error during scraping {url}: {result}")
+            errors[url] = str(result)
+            data.append(None)
+        else:
+            data.append(result)
+    print(f"Batch scraping and summarization completed: {len(errors)} failed.")
+
+    return {"Status": "Partial" if errors else "Success", "Data": data, "Errors": errors}
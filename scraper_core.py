@@ -0,0 +1,147 @@
+import asyncio
+import re
+from typing import Awaitable, Callable
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+import zstandard as zstd
+import orjson
+
+# Helpers shared by the scraping.py and reference.py apps
+
+# Cache expiration time (24 hours)
+CACHE_EXPIRATION = 24 * 60 * 60  # 24 hours in seconds
+
+# Batch limits: every miss opens a tab in the shared browser and makes an LLM call
+MAX_BATCH_URLS = 20
+MAX_CONCURRENT_SCRAPES = 4
+
+
+# Cached results are stored zstd-compressed. zstd frames start with a fixed
+# magic number, so plain-JSON entries written before compression still read.
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_zstd_compressor = zstd.ZstdCompressor(level=3)
+_zstd_decompressor = zstd.ZstdDecompressor()
+
+
+def compress_cache_value(value: str) -> bytes:
+    return _zstd_compressor.compress(value.encode("utf-8"))
+
+
+def decompress_cache_value(raw: bytes) -> str:
+    if raw.startswith(_ZSTD_MAGIC):
+        raw = _zstd_decompressor.decompress(raw)
+    return raw.decode("utf-8")
+
+
+# Markdown preprocessing: crawl4ai output carries a lot of layout noise that
+# only costs input tokens. Links with visible text are kept for readMore URLs.
+MAX_MARKDOWN_CHARS = 48_000  # ~12k tokens
+_MD_NOISE_LINE_RE = re.compile(r"^[\W_]+$")  # table rules, separators, bullets
+_MD_INLINE_IMAGE_RE = re.compile(r"!\[[^\]]*\]\([^)]*\)\s*")  # also inside links: [![alt](img)](url)
+_MD_EMPTY_LINK_RE = re.compile(r"\[\s*\]\([^)]*\)")
+_MD_URL_LINK_RE = re.compile(r"\[\s*(https?://[^\]\s]+)\s*\]\([^)]*\)")
+_MD_SPACES_RE = re.compile(r"[ \t]{2,}")
+_MD_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def compress_markdown(md: str) -> str:
+    lines = []
+    for line in md.splitlines():
+        line = _MD_INLINE_IMAGE_RE.sub("", line)
+        line = _MD_EMPTY_LINK_RE.sub("", line)
+        line = _MD_URL_LINK_RE.sub(r"\1", line)
+        line = _MD_SPACES_RE.sub(" ", line).strip()
+        if line and (len(line) < 3 or _MD_NOISE_LINE_RE.match(line)):
+            continue
+        lines.append(line)
+    text = _MD_BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+    return text[:MAX_MARKDOWN_CHARS]
+
+
+# Fixed summarization instructions; the crawled markdown is sent separately
+SUMMARY_SYSTEM_PROMPT = """
+You are an assistant specialized in summarizing news. Your tasks are:
+-Summarize the latest news based on the context provided in the user message.
+-Use web search to find the most recent and relevant updates related to the context.
+-Suggest additional ideas or angles based on the latest news.
+-Attach a referral link (source link) to each piece of summarized news.
+-Format your response in JSON format, including the following fields:
+    - title: The title of the news article.
+    - summary: A brief summary of the news article.
+    - readMore: The referral link to the news article.
+- Provide a list of all referral URLs at the end of your response.
+- Ensure that the JSON is well-structured and easy to read.
+"""
+
+
+# Shared across requests so concurrent batches can't pile up browser tabs either
+_scrape_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+
+async def _bounded(scrape: Callable[[str], Awaitable[str]], url: str) -> str:
+    async with _scrape_semaphore:
+        return await scrape(url)
+
+
+# Batch cache lookup: one MGET for all lookups, scrape misses concurrently,
+# then a single pipelined flush for the writes. Each app passes its own Redis
+# client (or None), scrape function and cache-key scheme. Returns one entry per
+# input URL: the parsed summary, or the exception raised while scraping/parsing it.
+async def check_cache_and_scrape_many(
+    urls: list[str],
+    *,
+    redis_client: Redis | None,
+    scrape: Callable[[str], Awaitable[str]],
+    cache_key: Callable[[str], str],
+) -> list[dict | BaseException]:
+    cache_keys = [cache_key(url) for url in urls]
+    # URLs that map to the same cache key are only scraped once
+    misses = {}
+    for key, url in zip(cache_keys, urls):
+        misses.setdefault(key, url)
+    results = {}
+
+    if redis_client:
+        try:
+            cached = await redis_client.mget(list(misses))
+        except (RedisConnectionError, OSError) as e:
+            print(f"Redis unavailable ({e}); proceeding without cache")
+            cached = []
+        for key, raw in zip(list(misses), cached):
+            if not raw:
+                continue
+            try:
+                results[key] = orjson.loads(decompress_cache_value(raw))
+            except (zstd.ZstdError, ValueError) as e:
+                # Corrupt entry: treat as a miss so it gets re-scraped and overwritten
+                print(f"Ignoring unreadable cache entry {key} ({e})")
+                continue
+            del misses[key]
+
+    print(f"Cache hits: {len(results)}, misses: {len(misses)}, scraping...")
+    scraped = await asyncio.gather(
+        *(_bounded(scrape, url) for url in misses.values()), return_exceptions=True
+    )
+    # Only cache results that parsed, even if other URLs in the batch failed
+    fresh = {}
+    for key, result in zip(misses, scraped):
+        if not isinstance(result, BaseException):
+            try:
+                parsed = orjson.loads(result)
+            except orjson.JSONDecodeError as e:
+                result = e
+            else:
+                fresh[key] = result
+                result = parsed
+        results[key] = result
+
+    if redis_client and fresh:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, result in fresh.items():
+                    pipe.setex(key, CACHE_EXPIRATION, compress_cache_value(result))
+                await pipe.execute()
+        except (RedisConnectionError, OSError) as e:
+            print(f"Redis unavailable while caching ({e}); returning uncached results")
+
+    return [results[key] for key in cache_keys]
@@ -1,12 +1,21 @@
-import json
 import os
 from fastapi import FastAPI, Request, HTTPException 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 import redis.asyncio as redis
 from redis.exceptions import ConnectionError as RedisConnectionError
+import orjson
 from crawl4ai import *
 from openai import AsyncOpenAI
+from scraper_core import (
+    CACHE_EXPIRATION,
+    MAX_BATCH_URLS,
+    SUMMARY_SYSTEM_PROMPT,
+    check_cache_and_scrape_many,
+    compress_cache_value,
+    compress_markdown,
+    decompress_cache_value,
+)
 
 
 # FastAPI app initialization
@@ -37,14 +46,24 @@ client = AsyncOpenAI(
 # In Docker, `localhost` refers to the container itself, so only enable Redis when explicitly configured.
 REDIS_URL = os.environ.get("REDIS_URL")
 redis_client = (
-    redis.from_url(REDIS_URL, decode_responses=True)
+    redis.from_url(REDIS_URL, decode_responses=False)
     if REDIS_URL
     else None
 )
 
 
+# Shared crawler (one browser for the app's lifetime instead of one per request)
+crawler = AsyncWebCrawler()
+
+
+@app.on_event("startup")
+async def _startup() -> None:
+    await crawler.start()
+
+
 @app.on_event("shutdown")
 async def _shutdown() -> None:
+    await crawler.close()
     if redis_client is not None:
         await redis_client.aclose()
 
@@ -52,36 +71,25 @@ async def _shutdown() -> None:
 class UrlRequest(BaseModel):
     url: str
 
-# Cache expiration time (24 hours)
-CACHE_EXPIRATION = 24 * 60 * 60  # 24 hours in seconds
+
+class UrlsRequest(BaseModel):
+    urls: list[str] = Field(..., max_length=MAX_BATCH_URLS)
+
 
 # Function to scrape and summarize the URL
 async def main(your_url: str):
 
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(
-            url=your_url,
-        )
+    result = await crawler.arun(
+        url=your_url,
+    )
 
     response = await client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
-            {
-                "role": "system",
-                "content": f"""
-                You are an assistant specialized in summarizing news. Your tasks are:
-                                    -Summarize the latest news based on the provided context: {result.markdown}.
-                                    -Use web search to find the most recent and relevant updates related to the context.
-                                    -Suggest additional ideas or angles based on the latest news.
-                                    -Attach a referral link (source link) to each piece of summarized news.
-                                    -Format your response in JSON format, including the following fields:
-                                        - title: The title of the news article.
-                                        - summary: A brief summary of the news article.
-                                        - readMore: The referral link to the news article.
-                                    - Provide a list of all referral URLs at the end of your response.
-                                    - Ensure that the JSON is well-structured and easy to read.
-                                    """
-            },
+            # Fixed instructions in the system message; the page content
+            # goes in its own user message instead of inside the prompt.
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": compress_markdown(str(result.markdown or ""))},
         ],
         response_format={"type": "json_object"}
     )
@@ -94,9 +102,13 @@ async def main(your_url: str):
 def read_root():
     return {"Hello": "World"}
 
+# Cache keys are the raw URL
+def cache_key_for(url: str) -> str:
+    return f"scraped:{url}"
+
 # Function to check Redis cache and scrape if necessary
 async def check_cache_and_scrape(url: str):
-    cache_key = f"scraped:{url}"
+    cache_key = cache_key_for(url)
 
     # If Redis isn't configured, just scrape without caching.
     if redis_client is None:
@@ -112,7 +124,7 @@ async def check_cache_and_scrape(url: str):
     if cached_data:
         # Return cached data if available and valid
         print(f"Cache hit for URL: {url}")
-        return cached_data
+        return decompress_cache_value(cached_data)
 
     # If no cache or expired, scrape and cache the result
     print(f"Cache miss for URL: {url}, scraping...")
@@ -122,7 +134,7 @@ async def check_cache_and_scrape(url: str):
 
         # Cache the result with a TTL of 24 hours (cache expires daily)
         try:
-            await redis_client.setex(cache_key, CACHE_EXPIRATION, result)
+            await redis_client.setex(cache_key, CACHE_EXPIRATION, compress_cache_value(result))
         except (RedisConnectionError, OSError) as e:
             print(f"Redis unavailable while caching ({e}); returning uncached result")
 
@@ -146,5 +158,31 @@ async def APIHandle(body: UrlRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
     # Parse the result to return as JSON
-    return {"Status": "Success", "Data": json.loads(result)}
+    return {"Status": "Success", "Data": orjson.loads(result)}
+
+
+# Endpoint for scraping several URLs in one request; URLs that fail are
+# reported in "Errors" (their "Data" entry is null) instead of failing the batch
+@app.post("/scraping/batch")
+async def APIHandleBatch(body: UrlsRequest):
+    print(f"Received {len(body.urls)} URLs")
+
+    try:
+        results = await check_cache_and_scrape_many(
+            body.urls, redis_client=redis_client, scrape=main, cache_key=cache_key_for
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    data = []
+    errors = {}
+    for url, result in zip(body.urls, results):
+        if isinstance(result, BaseException):
+            print(f"Error during scraping {url}: {result}")
+            errors[url] = str(result)
+            data.append(None)
+        else:
+            data.append(result)
+    print(f"Batch scraping and summarization completed: {len(errors)} failed.")
+
+    return {"Status": "Partial" if errors else "Success", "Data": data, "Errors": errors}
@@ -1,28 +1,26 @@
 import asyncio
-import json
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
+import orjson
 from crawl4ai import AsyncWebCrawler
 
 BASE_URL = "https://www.bbc.com"
+MAX_CONCURRENT_FETCHES = 6
+
+# Heuristics: common BBC sections that contain articles
+_ARTICLE_SECTION_RE = re.compile(r"/(?:news|sport|business|world)/")
+# Obvious non-HTML assets or media players
+_ASSET_RE = re.compile(r"\.(?:jpe?g|png|webp|gif|mp4|m3u8|pdf|css|js)(?:$|\?)", re.IGNORECASE)
 
 
 def _is_article_url(u: str, base_host: str) -> bool:
-    if not u or not u.startswith("http"):
-        return False
-    try:
-        host = urlparse(u).netloc
-    except Exception:
-        return False
-    if host != base_host:
+    # Same-host guard via prefix match instead of urlparse; article URLs
+    # always have a path, so requiring the trailing "/" is safe.
+    if not u or not u.startswith((f"https://{base_host}/", f"http://{base_host}/")):
         return False
-    # Heuristics: include common BBC sections that contain articles
-    if any(seg in u for seg in ["/news/", "/news/articles/", "/sport/", "/business/", "/world/"]):
-        # Exclude obvious non-HTML assets or media players
-        if not any(u.lower().endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".webp", ".gif", ".mp4", ".m3u8", ".pdf", ".css", ".js"]):
-            return True
-    return False
+    return bool(_ARTICLE_SECTION_RE.search(u)) and not _ASSET_RE.search(u)
 
 
 async def main():
@@ -33,7 +31,19 @@ async def main():
         base_host = urlparse(homepage.redirected_url or BASE_URL).netloc
         print("[STEP 2] Extracting article links...")
 
-        article_links = set()
+        # `seen` gives O(1) dedup (and skips re-filtering repeated hrefs);
+        # the list keeps homepage order so the [:12] slice is deterministic.
+        seen = set()
+        article_links = []
+
+        def add_link(href: str) -> None:
+            full_url = href if href.startswith("http") else urljoin(BASE_URL, href)
+            if full_url in seen:
+                return
+            seen.add(full_url)
+            if _is_article_url(full_url, base_host):
+                article_links.append(full_url)
+
         links = homepage.links or {}
         if isinstance(links, dict):
             for section in ("internal", "external"):
@@ -41,25 +51,23 @@ async def main():
                     href = (item or {}).get("href")
                     if not href:
                         continue
-                    full_url = href if href.startswith("http") else urljoin(BASE_URL, href)
-                    if _is_article_url(full_url, base_host):
-                        article_links.add(full_url)
+                    add_link(href)
         elif isinstance(links, list):
             # Fallback if links is a list of strings
             for href in links:
-                full_url = href if href.startswith("http") else urljoin(BASE_URL, href)
-                if _is_article_url(full_url, base_host):
-                    article_links.add(full_url)
+                add_link(href)
 
-        article_links = list(article_links)
         print(f"[FOUND] {len(article_links)} article links")
 
-        articles = []
-        # Limit to avoid over-fetching during demo
-        for url in article_links[:12]:
+        # Fetch articles concurrently (bounded) instead of one page at a time;
+        # each task reduces its CrawlResult to the small article dict.
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+        async def fetch_article(url: str):
             try:
-                print(f"[FETCHING] {url}")
-                result = await crawler.arun(url=url)
+                async with semaphore:
+                    print(f"[FETCHING] {url}")
+                    result = await crawler.arun(url=url)
                 text = (result.markdown or "").strip()
 
                 # Title from metadata fallbacks
@@ -75,28 +83,36 @@ async def main():
                 words = text.split()
                 summary = (" ".join(words[:70]) + "...") if len(words) > 70 else text
 
-                articles.append({
+                return {
                     "title": (title or "Untitled").strip(),
                     "summary": (summary or "No summary available").strip(),
                     "readMore": url,
-                })
+                }
             except Exception as e:
                 print(f"[ERROR] Failed to fetch {url}: {e}")
+                return None
+
+        # Limit to avoid over-fetching during demo
+        results = await asyncio.gather(*(fetch_article(url) for url in article_links[:12]))
+        articles = [article for article in results if article]
 
         output = {
             "articles": articles,
             "referralURLs": article_links,
         }
 
+        # Serialize once; reused for stdout and the saved file
+        data = orjson.dumps(output, option=orjson.OPT_INDENT_2)
+
         # Print JSON to stdout
-        print(json.dumps(output, indent=2, ensure_ascii=False))
+        print(data.decode("utf-8"))
 
         # Also save to file for convenience
         out_dir = Path("output")
         out_dir.mkdir(parents=True, exist_ok=True)
-        ts = datetime.utcnow().strftime("%Y%m%d_%H%M%SZ")
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%SZ")
         out_path = out_dir / f"news_bbc_{ts}.json"
-        out_path.write_text(json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8")
+        out_path.write_bytes(data)
         print(f"[SAVED] {out_path}")
 
 